@@ -31,13 +31,22 @@ def elsewhere_bundles(sankey_definition, add_elsewhere_waypoints=True):
 
     # For each process group, add new bundles to/from elsewhere if not already
     # existing. Each one should have a waypoint of rank +/- 1.
-    R = len(sankey_definition.ordering.layers)
+    layers = sankey_definition.ordering.layers
+    R = len(layers)
     new_waypoints = {}
     new_bundles = {}
 
     # Add elsewhere bundles to all process groups if there are no bundles to start with
     no_bundles = (len(sankey_definition.bundles) == 0)
 
+    # Rank of each node, found in one pass rather than searching the ordering
+    # for every process group.
+    ranks = {}
+    for r, bands in enumerate(layers):
+        for band in bands:
+            for u in band:
+                ranks.setdefault(u, r)
+
     for u, process_group in sankey_definition.nodes.items():
         # Skip waypoints
         if not isinstance(process_group, ProcessGroup):
@@ -45,7 +54,9 @@ def elsewhere_bundles(sankey_definition, add_elsewhere_waypoints=True):
 
         waypoint_title = '→' if process_group.direction == 'R' else '←'
         d_rank = +1 if process_group.direction == 'R' else -1
-        r, _, _ = sankey_definition.ordering.indices(u)
+        r = ranks.get(u)
+        if r is None:
+            raise ValueError('node "{}" not in ordering'.format(u))
 
         if no_bundles or (0 <= r + d_rank < R and u not in has_to_elsewhere):
             dummy_id = '__{}>'.format(u)
@@ -4,6 +4,8 @@ author: Rick Lupton
 created: 2018-01-19
 """
 
+import copy
+import functools
 import numpy as np
 from palettable.colorbrewer import qualitative, sequential
 
@@ -31,10 +33,10 @@ class CategoricalScale:
             self._next = (self._next + 1) % len(self.palette)
 
     def __call__(self, link, measures):
-        palette = self.get_palette()
         value = self.get_value(link, measures)
-        if value in self.lookup:
-            return self.lookup[value]
+        color = self.lookup.get(value)
+        if color is not None:
+            return color
         elif len(self.lookup) >= len(self.palette) and self.default:
             # Used up all the palette options
             return self.default
@@ -78,6 +80,19 @@ def prep_qualitative_palette(palette):
     #                 for m, v in zip(materials, itertools.cycle(palette))}
 
 
+@functools.lru_cache(maxsize=None)
+def _sequential_palette(name):
+    # palettable builds a new colormap on every access, and matplotlib only
+    # computes its lookup table on first use -- so keep hold of one per name.
+    # It is shared: copy it before handing it out where it might be modified.
+    try:
+        colormap = getattr(sequential, name).mpl_colormap
+    except AttributeError:
+        raise ValueError('No sequential palette called {}'.format(name)) from None
+    colormap(0.0)  # build the lookup table now, so copies share the work
+    return colormap
+
+
 class QuantitativeScale:
     default_palette_name = 'Reds_9'
 
@@ -106,10 +121,8 @@ class QuantitativeScale:
         return self.domain
 
     def lookup_palette_name(self, name):
-        try:
-            return getattr(sequential, name).mpl_colormap
-        except AttributeError:
-            raise ValueError('No sequential palette called {}'.format(name)) from None
+        # Copying the cached colormap is much cheaper than building a new one
+        return copy.copy(_sequential_palette(name))
 
     def get_palette(self, link):
         return self.palette
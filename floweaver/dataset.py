@@ -5,8 +5,7 @@ from .partition import Partition
 
 
 def leaves_below(tree, node):
-    return set(sum(([vv for vv in v if tree.out_degree(vv) == 0]
-                    for k, v in nx.dfs_successors(tree, node).items()), []))
+    return {v for v in nx.descendants(tree, node) if tree.out_degree(v) == 0}
 
 
 class Resolver:
@@ -131,44 +130,64 @@ def find_flows(flows,
                source_query,
                target_query,
                flow_query=None,
-               ignore_edges=None):
+               ignore_edges=None,
+               cache=None):
     """Filter flows according to source_query, target_query, and flow_query.
+
+    If `cache` is a dict, the results of evaluating the process and flow
+    selections against `flows` are stored in it and reused by later calls
+    with the same `flows` and `cache`.
     """
     if flow_query is not None:
-        flows = flows[eval_selection(flows, '', flow_query)]
+        selected = _eval_selection_cached(cache, flows, '', flow_query)
 
     if source_query is None and target_query is None:
         raise ValueError('source_query and target_query cannot both be None')
 
     elif source_query is None and target_query is not None:
-        qt = eval_selection(flows, 'target', target_query)
-        qs = (~eval_selection(flows, 'source', target_query) &
+        qt = _eval_selection_cached(cache, flows, 'target', target_query)
+        qs = (~_eval_selection_cached(cache, flows, 'source', target_query) &
               ~flows.index.isin(ignore_edges or []))
 
     elif source_query is not None and target_query is None:
-        qs = eval_selection(flows, 'source', source_query)
-        qt = (~eval_selection(flows, 'target', source_query) &
+        qs = _eval_selection_cached(cache, flows, 'source', source_query)
+        qt = (~_eval_selection_cached(cache, flows, 'target', source_query) &
               ~flows.index.isin(ignore_edges or []))
 
     else:
-        qs = eval_selection(flows, 'source', source_query)
-        qt = eval_selection(flows, 'target', target_query)
+        qs = _eval_selection_cached(cache, flows, 'source', source_query)
+        qt = _eval_selection_cached(cache, flows, 'target', target_query)
+
+    # Selections are evaluated against all the flows, so that they can be
+    # shared between calls with different flow queries.
+    if flow_query is not None:
+        qs = qs & selected
+        qt = qt & selected
 
     f = flows[qs & qt]
     if source_query is None:
         internal_source = None
     else:
-        internal_source = flows[qs & eval_selection(flows, 'target',
-                                                    source_query)]
+        internal_source = flows[qs & _eval_selection_cached(
+            cache, flows, 'target', source_query)]
     if target_query is None:
         internal_target = None
     else:
-        internal_target = flows[qt & eval_selection(flows, 'source',
-                                                    target_query)]
+        internal_target = flows[qt & _eval_selection_cached(
+            cache, flows, 'source', target_query)]
 
     return f, internal_source, internal_target
 
 
+def _eval_selection_cached(cache, df, column, sel):
+    if cache is None:
+        return eval_selection(df, column, sel)
+    key = (column, tuple(sel) if isinstance(sel, list) else sel)
+    if key not in cache:
+        cache[key] = eval_selection(df, column, sel)
+    return cache[key]
+
+
 def _apply_view(dataset, process_groups, bundles, flow_selection):
     # What we want to warn about is flows between process_groups in the view_graph; they
     # are "used", since they appear in Elsewhere bundles, but the connection
@@ -183,16 +202,22 @@ def _apply_view(dataset, process_groups, bundles, flow_selection):
     if flow_selection:
         table = table[eval_selection(table, '', flow_selection)]
 
+    # Process groups and flow selections are typically used by several
+    # bundles: only evaluate each selection once.
+    cache = {}
+
+    elsewhere_bundles = []
     for k, bundle in bundles.items():
         if bundle.from_elsewhere or bundle.to_elsewhere:
+            elsewhere_bundles.append((k, bundle))
             continue  # do these afterwards
 
         source = process_groups[bundle.source]
         target = process_groups[bundle.target]
         flows, internal_source, internal_target = \
-            find_flows(table, source.selection, target.selection, bundle.flow_selection)
-        assert len(used_edges.intersection(
-            flows.index.values)) == 0, 'duplicate bundle'
+            find_flows(table, source.selection, target.selection,
+                       bundle.flow_selection, cache=cache)
+        assert used_edges.isdisjoint(flows.index.values), 'duplicate bundle'
         bundle_flows[k] = flows
         used_edges.update(flows.index.values)
         used_process_groups.update(flows.source)
@@ -201,25 +226,22 @@ def _apply_view(dataset, process_groups, bundles, flow_selection):
         used_internal.update(internal_source.index.values)
         used_internal.update(internal_target.index.values)
 
-    for k, bundle in bundles.items():
+    for k, bundle in elsewhere_bundles:
         if bundle.from_elsewhere and bundle.to_elsewhere:
             raise ValueError('Cannot have flow from Elsewhere to Elsewhere')
 
         elif bundle.from_elsewhere:
             target = process_groups[bundle.target]
             flows, _, _ = find_flows(table, None, target.selection,
-                                     bundle.flow_selection, used_edges)
+                                     bundle.flow_selection, used_edges, cache)
             used_process_groups.add(bundle.target)
 
-        elif bundle.to_elsewhere:
+        else:
             source = process_groups[bundle.source]
             flows, _, _ = find_flows(table, source.selection, None,
-                                     bundle.flow_selection, used_edges)
+                                     bundle.flow_selection, used_edges, cache)
             used_process_groups.add(bundle.source)
 
-        else:
-            continue
-
         bundle_flows[k] = flows
 
     # XXX shouldn't this check processes in selections, not process groups?
@@ -1,7 +1,10 @@
 import itertools
-from palettable.colorbrewer import qualitative, sequential
+import functools
+from palettable.colorbrewer import qualitative
 import numpy as np
 
+from .color_scales import _sequential_palette
+
 
 # From matplotlib.colours
 def rgb2hex(rgb):
@@ -9,6 +12,21 @@ def rgb2hex(rgb):
     return '#%02x%02x%02x' % tuple([int(np.round(val * 255)) for val in rgb[:3]])
 
 
+def rgb2hex_array(rgb):
+    'Given an (N, 3) or (N, 4) array of 0-1 floats, return a list of hex strings'
+    rgb = np.round(np.asarray(rgb)[:, :3] * 255).astype(np.uint32)
+    packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    return ['#%06x' % x for x in packed.tolist()]
+
+
+@functools.lru_cache(maxsize=None)
+def _qualitative_palette(name):
+    try:
+        return tuple(getattr(qualitative, name).hex_colors)
+    except AttributeError:
+        raise ValueError('No qualitative palette called {}'.format(name)) from None
+
+
 def graph_to_sankey(G,
                     groups=None,
                     palette=None,
@@ -36,69 +54,73 @@ def graph_to_sankey(G,
     else:
         get_value = lambda data, key: get_data(data, key)[sample]
 
+    edges = list(G.edges(keys=True, data=True))
+
     if flow_color is None and hue is None:
         # qualitative colours based on material
         if palette is None:
             palette = 'Pastel1_8'
         if isinstance(palette, str):
-            try:
-                palette = getattr(qualitative, palette).hex_colors
-            except AttributeError:
-                raise ValueError('No qualitative palette called {}'.format(palette)) from None
+            palette = _qualitative_palette(palette)
         if not isinstance(palette, dict):
-            materials = sorted(set([m for v, w, (m, t) in G.edges(keys=True)]))
+            materials = sorted({m for v, w, (m, t), data in edges})
             palette = {m: v
                        for m, v in zip(materials, itertools.cycle(palette))}
-        get_color = lambda m, data: palette[m]
+        colors = [palette[m] for v, w, (m, t), data in edges]
 
     elif flow_color is None and hue is not None:
         if palette is None:
             palette = 'Reds_9'
+        # Named palettes are matplotlib colormaps, which can look up all the
+        # colours in one call; custom palettes are called once per link.
+        vectorised = isinstance(palette, str)
         if isinstance(palette, str):
-            try:
-                palette = getattr(sequential, palette).mpl_colormap
-            except AttributeError:
-                raise ValueError('No sequential palette called {}'.format(palette)) from None
+            palette = _sequential_palette(palette)
         if hue_norm:
             get_hue = lambda data: get_value(data, hue) / get_value(data, 'value')
         elif callable(hue):
             get_hue = hue
         else:
             get_hue = lambda data: get_value(data, hue)
-        values = np.array([get_hue(data) for _, _, data in G.edges(data=True)])
+        values = np.array([get_hue(data) for v, w, k, data in edges])
         if hue_range is None:
             vmin, vmax = values.min(), values.max()
         else:
             vmin, vmax = hue_range
-        get_color = lambda m, data: rgb2hex(palette((get_hue(data) - vmin) / (vmax - vmin)))
+        normed = (values - vmin) / (vmax - vmin)
+        if vectorised:
+            colors = rgb2hex_array(palette(normed))
+        else:
+            colors = [rgb2hex(palette(x)) for x in normed]
 
     else:
-        get_color = flow_color
-
-    links = []
-    nodes = []
+        colors = [flow_color(m, data) for v, w, (m, t), data in edges]
 
-    for v, w, (m, t), data in G.edges(keys=True, data=True):
-        links.append({
+    links = [
+        {
             'source': v,
             'target': w,
             'type': m,
             'time': t,
             'value': get_value(data, 'value'),
             'bundles': [str(x) for x in data.get('bundles', [])],
-            'color': get_color(m, data),
+            'color': color,
             'title': str(m),
             'opacity': 1.0,
-        })
+        }
+        for (v, w, (m, t), data), color in zip(edges, colors)
+    ]
 
-    for u, data in G.nodes(data=True):
-        nodes.append({
+    nodes = [
+        {
             'id': u,
             'title': str(data.get('title', u)),
             'style': data.get('type', 'default'),
             'direction': 'l' if data.get('direction', 'R') == 'L' else 'r',
             'visibility': 'hidden' if data.get('title') == '' else 'visible',
-        })
+        }
+        for u, data in G.nodes(data=True)
+    ]
 
     return {
         'nodes': nodes,
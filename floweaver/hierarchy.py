@@ -7,9 +7,8 @@ class Hierarchy:
         self.column = column
 
     def _leaves_below(self, node):
-        leaves = sum(([vv for vv in v if self.tree.out_degree(vv) == 0]
-                      for k, v in nx.dfs_successors(self.tree, node).items()),
-                     [])
+        leaves = [v for v in nx.descendants(self.tree, node)
+                  if self.tree.out_degree(v) == 0]
         return sorted(leaves) or [node]
 
     def __call__(self, *nodes):
@@ -13,7 +13,7 @@ def _convert_layers(layers):
                  for layer_bands in layers)
 
 
-@attr.s(slots=True, frozen=True, repr=False)
+@attr.s(slots=True, frozen=True, repr=False, cache_hash=True)
 class Ordering(object):
     layers = attr.ib(converter=_convert_layers)
 
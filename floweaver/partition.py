@@ -2,18 +2,18 @@ import attr
 
 
 def _validate_query(instance, attribute, value):
-    if value:
-        if not all(isinstance(x, tuple) and len(x) == 2 for x in value):
+    for x in value:
+        if not (isinstance(x, tuple) and len(x) == 2):
             raise ValueError('All elements of query should be 2-tuples')
 
 
-@attr.s(slots=True, frozen=True)
+@attr.s(slots=True, frozen=True, cache_hash=True)
 class Group(object):
     label = attr.ib(converter=str)
     query = attr.ib(converter=tuple, validator=_validate_query)
 
 
-@attr.s(slots=True, frozen=True)
+@attr.s(slots=True, frozen=True, cache_hash=True)
 class Partition(object):
     groups = attr.ib(default=attr.Factory(tuple), converter=tuple)
 
@@ -28,7 +28,7 @@ class Partition(object):
                 label, items = v
             else:
                 label, items = v, (v, )
-            return Group(label, [(dimension, tuple(items))])
+            return Group(label, ((dimension, tuple(items)), ))
 
         groups = [make_group(v) for v in values]
 
@@ -48,8 +48,8 @@ class Partition(object):
 
     def __mul__(self, other):
         """Cartesian product"""
-        groups = [
+        groups = tuple(
             Group('{}/{}'.format(g1.label, g2.label), g1.query + g2.query)
             for g1 in self.groups for g2 in other.groups
-        ]
+        )
         return Partition(groups)
@@ -1,7 +1,6 @@
 import pandas as pd
 
 from .layered_graph import MultiLayeredGraph, Ordering
-from .partition import Partition, Group
 from .sankey_definition import ProcessGroup
 
 
@@ -116,13 +115,6 @@ def nodes_from_partition(u, partition):
                 for value in partition.labels + ['_']]
 
 
-def agg_one_group(agg):
-    def data(group):
-        result = group.groupby(lambda x: '').agg(agg)
-        return {k: result[k].iloc[0] for k in result}
-    return data
-
-
 def group_flows(flows,
                 v,
                 partition1,
@@ -133,13 +125,13 @@ def group_flows(flows,
                 measures):
 
     if callable(measures):
-        data = measures
+        agg = None
     elif isinstance(measures, str):
-        data = agg_one_group({measures: 'sum'})
+        agg = {measures: 'sum'}
     elif isinstance(measures, list):
-        data = agg_one_group({k: 'sum' for k in measures})
+        agg = {k: 'sum' for k in measures}
     elif isinstance(measures, dict):
-        data = agg_one_group(measures)
+        agg = measures
     else:
         raise ValueError('measure must be str, list, dict or callable')
 
@@ -150,16 +142,42 @@ def group_flows(flows,
     set_partition_keys(e, time_partition, 'k4', '')
     grouped = e.groupby(['k1', 'k2', 'k3', 'k4'])
 
+    if agg is None:
+        return [
+            (source, target, (material, time),
+             {'measures': measures(group), 'original_flows': group.index.tolist()})
+            for (source, target, material, time), group in grouped
+        ]
+
+    # Aggregate all groups in one go, rather than a separate groupby for
+    # each group.
+    totals = grouped.agg(agg)
+    columns = {k: totals[k].to_numpy() for k in totals}
+    flow_ids = grouped.groups
     return [
         (source, target, (material, time),
-         {'measures': data(group), 'original_flows': list(group.index)})
-        for (source, target, material, time), group in grouped
+         {'measures': {k: values[i] for k, values in columns.items()},
+          'original_flows': flow_ids[source, target, material, time].tolist()})
+        for i, (source, target, material, time) in enumerate(totals.index)
     ]
 
 
 def set_partition_keys(df, partition, key_column, prefix, process_side=None):
     if partition is None:
-        partition = Partition([Group('*', [])])
+        # Everything in one group: no need to look at the flows at all
+        df[key_column] = prefix + '*'
+        return
+
+    simple = _single_dimension_lookup(partition)
+    if simple is not None:
+        # Look up every row's label at once, rather than scanning the whole
+        # column once for each group.
+        dim, lookup = simple
+        if dim.startswith('process') and process_side:
+            dim = process_side + dim[7:]
+        df[key_column] = prefix + df[dim].map(lookup).fillna('_')  # _ -> other
+        return
+
     df[key_column] = prefix + '_'  # other
     seen = (df.index != df.index)  # False
     for group in partition.groups:
@@ -167,12 +185,37 @@ def set_partition_keys(df, partition, key_column, prefix, process_side=None):
         for dim, values in group.query:
             if dim.startswith('process') and process_side:
                 dim = process_side + dim[7:]
-            q = q & df[dim].isin(values)
-        if any(q & seen):
-            dup = df[q & seen]
+            column = df[dim]  # still raises KeyError for unknown dimensions
+            if q.any():  # skip the scan once no flows are left to match
+                q = q & column.isin(values)
+        dup = q & seen
+        if dup.any():
+            dup = df[dup]
             raise ValueError('Duplicate values in group {} ({}): {}'
                              .format(group, process_side, ', '.join(
                                  ['{}-{}'.format(e.source, e.target)
                                   for _, e in dup.iterrows()])))
         df.loc[q, key_column] = prefix + str(group.label)
         seen = seen | q
+
+
+def _single_dimension_lookup(partition):
+    """If all groups in `partition` select distinct values of the same
+    dimension, return the dimension and a dict from value to group label.
+    Otherwise return None."""
+    dim = None
+    lookup = {}
+    for group in partition.groups:
+        if len(group.query) != 1:
+            return None
+        group_dim, values = group.query[0]
+        if dim is not None and group_dim != dim:
+            return None
+        dim = group_dim
+        for value in values:
+            if value in lookup:
+                return None  # overlapping groups -- let the full check report it
+            lookup[value] = str(group.label)
+    if dim is None:
+        return None
+    return dim, lookup
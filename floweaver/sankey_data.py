@@ -5,8 +5,12 @@ Created: 2018-01-15
 """
 
 import json
+import math
+import types
 import attr
+import numpy as np
 from collections import defaultdict
+from itertools import chain
 
 from .sankey_definition import _validate_direction, _convert_ordering
 from .ordering import Ordering
@@ -18,8 +22,68 @@ try:
 except ImportError:
     SankeyWidget = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 _validate_opt_str = attr.validators.optional(attr.validators.instance_of(str))
 
+_DEFAULT_WIDGET_MARGINS = {
+    "top": 25,
+    "bottom": 10,
+    "left": 130,
+    "right": 130,
+}
+
+
+def _dumps(obj):
+    """Encode `obj` as JSON bytes, using orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY |
+                            orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_like_orjson(obj), allow_nan=False, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def _like_orjson(obj):
+    """Convert numpy values to Python ones, and NaN/infinity to None, so that
+    the stdlib json module gives the same output as orjson."""
+    if isinstance(obj, dict):
+        return {k: _like_orjson(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [_like_orjson(v) for v in obj]
+    elif isinstance(obj, np.ndarray):
+        return _like_orjson(obj.tolist())
+    elif isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+def _write_json(f, data):
+    """Write dict `data` as JSON to binary file `f`.
+
+    Generator values are written as lists one item at a time, so the full
+    list never needs to be held in memory.
+    """
+    f.write(b'{')
+    for i, (key, value) in enumerate(data.items()):
+        if i > 0:
+            f.write(b',')
+        f.write(_dumps(key) + b':')
+        if isinstance(value, types.GeneratorType):
+            f.write(b'[')
+            for j, item in enumerate(value):
+                if j > 0:
+                    f.write(b',')
+                f.write(_dumps(item))
+            f.write(b']')
+        else:
+            f.write(_dumps(value))
+    f.write(b'}')
+
 
 @attr.s(slots=True, frozen=True)
 class SankeyData(object):
@@ -30,12 +94,30 @@ class SankeyData(object):
     dataset = attr.ib(default=None)
 
     def to_json(self, filename=None, format=None):
-        """Convert data to JSON-ready dictionary."""
+        """Convert data to JSON-ready dictionary.
+
+        If `filename` is given, the data is written there instead, one node
+        or link at a time, using orjson if it is installed.
+        """
+        if format == "widget":
+            node_to_json = SankeyNode._to_json_widget
+            link_to_json = SankeyLink._to_json_widget
+        else:
+            node_to_json = SankeyNode._to_json_v2
+            link_to_json = SankeyLink._to_json_v2
+
+        layers = self.ordering.layers
+        nodes = (node_to_json(n) for n in self.nodes)
+        links = (link_to_json(l) for l in self.links)
+        if filename is None:
+            nodes = list(nodes)
+            links = list(links)
+
         if format == "widget":
             data = {
-                "nodes": [n.to_json(format) for n in self.nodes],
-                "links": [l.to_json(format) for l in self.links],
-                "order": self.ordering.layers,
+                "nodes": nodes,
+                "links": links,
+                "order": layers,
                 "groups": self.groups,
             }
         else:
@@ -44,18 +126,18 @@ class SankeyData(object):
                 "metadata": {
                     "title": "A Sankey diagram",
                     "authors": [],
-                    "layers": self.ordering.layers,
+                    "layers": layers,
                 },
-                "nodes": [n.to_json(format) for n in self.nodes],
-                "links": [l.to_json(format) for l in self.links],
+                "nodes": nodes,
+                "links": links,
                 "groups": self.groups,
             }
 
         if filename is None:
             return data
         else:
-            with open(filename, "wt") as f:
-                json.dump(data, f)
+            with open(filename, "wb") as f:
+                _write_json(f, data)
 
     def to_widget(
         self,
@@ -72,12 +154,7 @@ class SankeyData(object):
             raise RuntimeError("ipysankeywidget is required")
 
         if margins is None:
-            margins = {
-                "top": 25,
-                "bottom": 10,
-                "left": 130,
-                "right": 130,
-            }
+            margins = dict(_DEFAULT_WIDGET_MARGINS)
 
         value = self.to_json(format="widget")
         widget = SankeyWidget(
@@ -94,35 +171,20 @@ class SankeyData(object):
 
         if debugging:
             output = Output()
+            link_index = _index_links(self.links, self.nodes)
 
             def callback(_, d):
                 with output:
                     clear_output()
                 if not d:
                     return
-                if d["source"].startswith("__from_elsewhere_"):
-                    d["source"] = None
-                elif d["target"].startswith("__to_elsewhere_"):
-                    d["target"] = None
-                link = [
-                    l
-                    for l in (
-                            self.links +
-                            [l for n in self.nodes for l in n.from_elsewhere_links] +
-                            [l for n in self.nodes for l in n.to_elsewhere_links]
-                    )
-                    if l.source == d["source"]
-                    and l.target == d["target"]
-                    and l.type == d["type"]
-                ]
-                assert len(link) == 1
-                link = link[0]
+                original_flows = _clicked_flows(link_index, d)
                 with output:
                     display("Flows in dataset contributing to this link:")
                     if self.dataset:
-                        display(self.dataset._table.loc[link.original_flows])
+                        display(self.dataset._table.loc[original_flows])
                     else:
-                        display(link.original_flows)
+                        display(original_flows)
 
             widget.on_link_clicked(callback)
             return VBox([widget, output])
@@ -130,6 +192,37 @@ class SankeyData(object):
             return widget
 
 
+def _index_links(links, nodes):
+    """Index `links`, and the nodes' Elsewhere links, by (source, target, type).
+
+    Each key maps to a list, since links at different times share a key.
+    """
+    link_index = defaultdict(list)
+    elsewhere_links = (l for n in nodes
+                       for l in chain(n.from_elsewhere_links, n.to_elsewhere_links))
+    for l in chain(links, elsewhere_links):
+        link_index[l.source, l.target, l.type].append(l)
+    return link_index
+
+
+def _clicked_flows(link_index, d):
+    """Original flows of the link(s) matching the widget click data `d`.
+
+    The widget doesn't send the link time, so unless `d` has one, the flows of
+    all links between the same nodes with the same type are returned.
+    """
+    source, target = d["source"], d["target"]
+    if source.startswith("__from_elsewhere_"):
+        source = None
+    elif target.startswith("__to_elsewhere_"):
+        target = None
+    links = link_index.get((source, target, d["type"]), [])
+    time = d.get("time")
+    if time is not None:
+        links = [l for l in links if l.time == time]
+    return [flow for l in links for flow in l.original_flows]
+
+
 @attr.s(slots=True, frozen=True)
 class SankeyNode(object):
     id = attr.ib(validator=attr.validators.instance_of(str))
@@ -143,25 +236,31 @@ class SankeyNode(object):
     def to_json(self, format=None):
         """Convert node to JSON-ready dictionary."""
         if format == "widget":
-            return {
-                "id": self.id,
-                "title": self.title if self.title is not None else self.id,
+            return self._to_json_widget()
+        else:
+            return self._to_json_v2()
+
+    def _to_json_widget(self):
+        return {
+            "id": self.id,
+            "title": self.title if self.title is not None else self.id,
+            "direction": self.direction.lower(),
+            "hidden": self.hidden is True or self.title == "",
+            "type": self.style if self.style is not None else "default",
+            "fromElsewhere": [l._to_json_widget() for l in self.from_elsewhere_links],
+            "toElsewhere": [l._to_json_widget() for l in self.to_elsewhere_links]
+        }
+
+    def _to_json_v2(self):
+        return {
+            "id": self.id,
+            "title": self.title if self.title is not None else self.id,
+            "style": {
                 "direction": self.direction.lower(),
                 "hidden": self.hidden is True or self.title == "",
                 "type": self.style if self.style is not None else "default",
-                "fromElsewhere": [l.to_json(format) for l in self.from_elsewhere_links],
-                "toElsewhere": [l.to_json(format) for l in self.to_elsewhere_links]
-            }
-        else:
-            return {
-                "id": self.id,
-                "title": self.title if self.title is not None else self.id,
-                "style": {
-                    "direction": self.direction.lower(),
-                    "hidden": self.hidden is True or self.title == "",
-                    "type": self.style if self.style is not None else "default",
-                },
-            }
+            },
+        }
 
 
 def _validate_opacity(instance, attr, value):
@@ -187,25 +286,31 @@ class SankeyLink(object):
     def to_json(self, format=None):
         """Convert link to JSON-ready dictionary."""
         if format == "widget":
-            return {
-                "source": self.source,
-                "target": self.target,
-                "type": self.type,
-                "time": self.time,
-                "value": self.link_width,
-                "title": self.title,
-                "color": self.color,
-                "opacity": self.opacity,
-                "data": self.data,
-            }
+            return self._to_json_widget()
         else:
-            return {
-                "source": self.source,
-                "target": self.target,
-                "type": self.type,
-                "title": self.title,
-                "time": self.time,
-                "link_width": self.link_width,
-                "data": self.data,
-                "style": {"color": self.color, "opacity": self.opacity,},
-            }
+            return self._to_json_v2()
+
+    def _to_json_widget(self):
+        return {
+            "source": self.source,
+            "target": self.target,
+            "type": self.type,
+            "time": self.time,
+            "value": self.link_width,
+            "title": self.title,
+            "color": self.color,
+            "opacity": self.opacity,
+            "data": self.data,
+        }
+
+    def _to_json_v2(self):
+        return {
+            "source": self.source,
+            "target": self.target,
+            "type": self.type,
+            "title": self.title,
+            "time": self.time,
+            "link_width": self.link_width,
+            "data": self.data,
+            "style": {"color": self.color, "opacity": self.opacity,},
+        }
@@ -251,7 +251,7 @@ def _validate_flow_selection(instance, attribute, value):
 
 
 @no_default_vals_in_repr
-@attr.s(frozen=True, slots=True)
+@attr.s(frozen=True, slots=True, cache_hash=True)
 class Bundle(object):
     """A Bundle represents a set of flows between two :class:`ProcessGroup`s.
 
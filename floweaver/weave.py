@@ -38,7 +38,10 @@ def weave(
     # Add implicit to/from Elsewhere bundles to the view definition to ensure
     # consistency.
     new_waypoints, new_bundles = elsewhere_bundles(sankey_definition, add_elsewhere_waypoints)
-    GV2 = augment(GV, new_waypoints, new_bundles)
+    if new_bundles:
+        GV2 = augment(GV, new_waypoints, new_bundles)
+    else:
+        GV2 = GV  # nothing to add, so no need for augment() to copy GV
 
     # XXX messy
     bundles2 = dict(sankey_definition.bundles, **new_bundles)
@@ -62,7 +62,7 @@ setup(
         'numpy',
         'pandas',
         'networkx >=2.1',
-        'attrs >=17.4',
+        'attrs >=19.1.0',
         'palettable',
     ],
     extras_require={
@@ -17,6 +17,16 @@ def test_bundle_hashable():
     assert hash(Bundle('a', 'b'))
 
 
+def test_equal_bundles_hash_equal():
+    b1 = Bundle('a', 'b', waypoints=['w'])
+    b2 = Bundle('a', 'b', waypoints=('w', ))
+    assert b1 == b2
+    assert hash(b1) == hash(b2)
+    assert hash(b1) == hash(b1)
+    assert {b1: 1}[b2] == 1
+    assert Bundle('a', 'b') != b1
+
+
 def test_bundle_to_self_allowed_only_if_flow_selection_specified():
     with pytest.raises(ValueError):
         Bundle('x', 'x')
@@ -1,3 +1,5 @@
+import pytest
+
 from floweaver.color_scales import CategoricalScale, QuantitativeScale
 from floweaver.sankey_data import SankeyLink
 
@@ -108,6 +110,19 @@ def test_quantitative_scale_custom_get_palette():
     assert s(link2, {'value': 1}) == '#08306b'
 
 
+def test_quantitative_scale_lookup_palette_name():
+    s = QuantitativeScale('value')
+    assert s.lookup_palette_name('Reds_9')(0.5) == s.lookup_palette_name('Reds_9')(0.5)
+    # Palettes arrive with their lookup table already built
+    assert s.lookup_palette_name('Blues_9')._isinit
+    # Each scale gets its own colormap, so changing one doesn't affect others
+    assert s.lookup_palette_name('Reds_9') is not s.lookup_palette_name('Reds_9')
+    s.palette.name = 'changed'
+    assert QuantitativeScale('value').palette.name != 'changed'
+    with pytest.raises(ValueError):
+        s.lookup_palette_name('NotAPalette_9')
+
+
 def test_quantitative_scale_custom_get_value():
     link = SankeyLink('a', 'b')
 
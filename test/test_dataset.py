@@ -2,7 +2,7 @@ import pytest
 
 import pandas as pd
 
-from floweaver.dataset import Dataset, eval_selection
+from floweaver.dataset import Dataset, eval_selection, find_flows
 from floweaver.sankey_definition import ProcessGroup, Bundle, Elsewhere
 
 
@@ -83,6 +83,44 @@ def test_selection_string():
         == [True, False, False, False]
 
 
+def test_find_flows_cache():
+    """Selections evaluated once are shared between calls using the same cache,
+    with or without a flow query, without changing the results."""
+    table = _dataset()._table
+
+    def check(cache, *args):
+        expected = find_flows(table, *args)
+        result = find_flows(table, *args, cache=cache)
+        for r, e in zip(result, expected):
+            if e is None:
+                assert r is None
+            else:
+                pd.testing.assert_frame_equal(r, e)
+        return result[0]
+
+    cache = {}
+    flows = check(cache, ['a1', 'a2'], 'function == "b"')
+    assert list(flows.index) == [0, 1]
+    assert set(cache) == {
+        ('source', ('a1', 'a2')), ('target', ('a1', 'a2')),
+        ('source', 'function == "b"'), ('target', 'function == "b"'),
+    }
+    entries = dict(cache)
+
+    # Same selections with a flow query: only the flow query is evaluated
+    flows = check(cache, ['a1', 'a2'], 'function == "b"', 'material == "m1"')
+    assert list(flows.index) == [0]
+    assert set(cache) == set(entries) | {('', 'material == "m1"')}
+    assert all(cache[k] is v for k, v in entries.items())
+    entries = dict(cache)
+
+    # Elsewhere-style queries reuse both the selections and the flow query
+    check(cache, None, 'function == "b"', 'material == "m1"')
+    check(cache, ['a1', 'a2'], None)
+    assert set(cache) == set(entries)
+    assert all(cache[k] is v for k, v in entries.items())
+
+
 def test_dataset_only_includes_unused_flows_in_elsewhere_bundles():
     # Bundle 0 should include flow 0, bundle 1 should include flow 1
     nodes = {
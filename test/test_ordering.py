@@ -10,6 +10,7 @@ def test_ordering_normalisation():
     o1 = Ordering([['a', 'b'], ['c']])
     o2 = Ordering([[['a', 'b']], [['c']]])
     assert o1 == o2
+    assert hash(o1) == hash(o2)
 
 
 def test_ordering_insert():
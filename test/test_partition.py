@@ -49,3 +49,15 @@ def test_partition_simple_checks_for_duplicates():
             ('label1', ['a', 'b']),
             'b'
         ])
+
+
+def test_partition_equality_and_hash():
+    G1 = Partition.Simple('dim1', ['x', ('group', ['y', 'z'])])
+    G2 = Partition([Group('x', [('dim1', ('x', ))]),
+                    Group('group', [('dim1', ('y', 'z'))])])
+    assert G1 == G2
+    assert hash(G1) == hash(G2)
+    assert len({G1, G2}) == 1
+
+    assert G1 != Partition.Simple('dim1', ['x', 'y'])
+    assert hash(G1.groups[0]) == hash(Group('x', [('dim1', ('x', ))]))
@@ -1,10 +1,12 @@
+import pytest
+
 import numpy as np
 import pandas as pd
 
 from floweaver.layered_graph import LayeredGraph, Ordering
-from floweaver.results_graph import results_graph
+from floweaver.results_graph import results_graph, set_partition_keys
 from floweaver.sankey_definition import ProcessGroup, Waypoint, Bundle
-from floweaver.partition import Partition
+from floweaver.partition import Partition, Group
 
 
 def test_results_graph_overall():
@@ -410,6 +412,44 @@ def test_results_graph_elsewhere_stubs():
     ]
 
 
+def test_set_partition_keys():
+    flows = pd.DataFrame.from_records(
+        [
+            ('a1', 'b1', 'm', 1),
+            ('a2', 'b1', 'n', 1),
+            ('a1', 'b2', 'n', 2),
+            ('a3', 'b2', 'o', 2),
+        ],
+        columns=('source', 'target', 'material', 'time'))
+
+    # Single dimension: values looked up directly
+    e = flows.copy()
+    set_partition_keys(e, Partition.Simple('process', ['a1', ('a', ['a2'])]),
+                       'k', 'x^', process_side='source')
+    assert list(e['k']) == ['x^a1', 'x^a', 'x^a1', 'x^_']
+
+    # Several dimensions per group
+    e = flows.copy()
+    set_partition_keys(e, Partition([
+        Group('m1', [('material', ('m', )), ('time', (1, ))]),
+        Group('n2', [('material', ('n', )), ('time', (2, ))]),
+    ]), 'k', '')
+    assert list(e['k']) == ['m1', '_', 'n2', '_']
+
+    # Unknown dimensions are reported even when no flows are left to match
+    with pytest.raises(KeyError):
+        set_partition_keys(flows.copy(), Partition([
+            Group('a', [('material', ('zz', )), ('nocol', ('x', ))]),
+        ]), 'k', '')
+
+    # Overlapping groups are still reported
+    with pytest.raises(ValueError):
+        set_partition_keys(flows.copy(), Partition([
+            Group('x', [('material', ('m', 'n'))]),
+            Group('y', [('material', ('n', ))]),
+        ]), 'k', '')
+
+
 def _twonode_viewgraph():
     view_graph = LayeredGraph()
     view_graph.add_node('a', node=ProcessGroup())
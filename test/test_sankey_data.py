@@ -1,6 +1,11 @@
+import json
+
+import numpy as np
 import pytest
 
-from floweaver.sankey_data import SankeyData, SankeyNode, SankeyLink
+from floweaver import sankey_data
+from floweaver.sankey_data import (SankeyData, SankeyNode, SankeyLink,
+                                   _index_links, _clicked_flows)
 
 
 def test_sankey_data():
@@ -16,9 +21,44 @@ def test_sankey_data():
 def test_sankey_data_json():
     data = SankeyData(nodes=[SankeyNode(id='a')],
                       links=[SankeyLink(source='a', target='a')])
-    json = data.to_json()
-    assert json['nodes'] == [n.to_json() for n in data.nodes]
-    assert json['links'] == [l.to_json() for l in data.links]
+    result = data.to_json()
+    assert result['nodes'] == [n.to_json() for n in data.nodes]
+    assert result['links'] == [l.to_json() for l in data.links]
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_sankey_data_json_file(tmp_path, monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(sankey_data, 'orjson', None)
+
+    data = SankeyData(nodes=[SankeyNode(id='a')],
+                      links=[SankeyLink(source='a', target='a', link_width=2,
+                                        data={'value': np.float64(2.5),
+                                              'count': np.int64(3),
+                                              'missing': float('nan'),
+                                              'big': np.float32('inf')})])
+    filename = str(tmp_path / 'sankey.json')
+    data.to_json(filename)
+    with open(filename) as f:
+        result = json.load(f)
+    assert result['format'] == 'sankey-v2'
+    assert result['nodes'] == [n.to_json() for n in data.nodes]
+    assert result['links'][0]['link_width'] == 2.0
+    # NaN and infinity aren't valid JSON, so both encoders write null
+    assert result['links'][0]['data'] == {
+        'value': 2.5, 'count': 3, 'missing': None, 'big': None}
+
+
+def test_json_encoders_match(monkeypatch):
+    pytest.importorskip('orjson')
+    obj = {'a': [1, 2.5, np.float64(0.1), np.int64(3), None, 'é'],
+           'b': {'nan': np.nan, 'inf': float('-inf'), 'arr': np.array([1.5, 2])},
+           'c': (True, False)}
+    expected = sankey_data._dumps(obj)
+    monkeypatch.setattr(sankey_data, 'orjson', None)
+    assert sankey_data._dumps(obj) == expected
 
 
 def test_sankey_data_node_json():
@@ -91,3 +131,35 @@ def test_sankey_data_link_json():
         'opacity': 0.9,
         'color': 'blue',
     }
+
+
+def test_index_links():
+    l1 = SankeyLink('a', 'b', type='*', time='1')
+    l2 = SankeyLink('a', 'b', type='*', time='2')
+    l3 = SankeyLink('a', None, type='*', time='1')
+    nodes = [SankeyNode('a', from_elsewhere_links=[], to_elsewhere_links=[l3])]
+    index = _index_links([l1, l2], nodes)
+    assert index == {
+        ('a', 'b', '*'): [l1, l2],
+        ('a', None, '*'): [l3],
+    }
+
+
+def test_clicked_flows():
+    l1 = SankeyLink('a', 'b', type='*', time='1', original_flows=[0, 1])
+    l2 = SankeyLink('a', 'b', type='*', time='2', original_flows=[2])
+    l3 = SankeyLink('a', None, type='*', original_flows=[3])
+    nodes = [SankeyNode('a', from_elsewhere_links=[], to_elsewhere_links=[l3])]
+    index = _index_links([l1, l2], nodes)
+
+    # Shaped like the widget's click data, which has no time: all links
+    # between the nodes are shown
+    d = {'source': 'a', 'target': 'b', 'type': '*', 'value': 3}
+    assert _clicked_flows(index, d) == [0, 1, 2]
+
+    # If a time is given, only that link's flows
+    assert _clicked_flows(index, dict(d, time='2')) == [2]
+
+    # Elsewhere links are drawn to dummy nodes
+    d = {'source': 'a', 'target': '__to_elsewhere_a', 'type': '*', 'value': 1}
+    assert _clicked_flows(index, d) == [3]